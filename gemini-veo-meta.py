@@ -1,13 +1,29 @@
-import json
+import asyncio
+import functools
+import hashlib
 import os
-import time
-import requests
+import random
+import httpx
+import orjson
 import replicate
 import re
-from pydantic import BaseModel, Field, AnyUrl
+from pydantic import BaseModel, Field, AnyUrl, ValidationError
 from typing import List, Optional
 from dotenv import load_dotenv
 
+# replicate releases before FileOutput return plain URL strings instead
+try:
+    from replicate.helpers import FileOutput
+except ImportError:
+    FileOutput = None
+
+# HTTP/2 support is optional (pip install httpx[http2]); fall back to HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Load environment variables from .env file
 # Make sure to create a .env file in the same directory as this script
 # with OPENROUTER_API_KEY and REPLICATE_API_KEY
@@ -17,6 +33,16 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+# Maximum number of ideas processed at once, to stay within provider rate limits
+MAX_CONCURRENT_GENERATIONS = 3
+
+# Upper bound in seconds for a single retry wait; a longer Retry-After gives up
+MAX_RETRY_DELAY = 30.0
+
+# Chunk size used when downloading a video from a plain URL output
+# (FileOutput results are streamed with replicate's own chunking)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 # Replicate configuration - handle both REPLICATE_API_KEY and REPLICATE_API_TOKEN
 # If user has REPLICATE_API_KEY, set it as REPLICATE_API_TOKEN for the library
 REPLICATE_API_KEY = os.getenv("REPLICATE_API_KEY", "")
@@ -24,6 +50,52 @@ if REPLICATE_API_KEY and not os.getenv("REPLICATE_API_TOKEN"):
     os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_KEY
 
 
+# Single-character replacements applied in one pass via str.translate
+_CHAR_REPLACEMENTS = {
+    # Smart single quotes to regular quotes (safe inside JSON strings)
+    '\u2018': "'",
+    '\u2019': "'",
+
+    # Mathematical notation
+    '≈': 'approximately',
+    '±': 'plus or minus',
+    '∞': 'infinity',
+
+    # Other problematic characters
+    '…': '...',
+    '–': '-',
+    '—': '-',
+}
+
+# Control characters can break JSON: whitespace ones (tab, carriage return,
+# newline, ...) become spaces, the rest (null character, ...) are removed
+_CONTROL_CHARS = {
+    chr(c): ' ' if chr(c).isspace() else None
+    for c in (*range(0x00, 0x20), *range(0x7f, 0xa0))
+}
+_TRANSLATE = str.maketrans({**_CONTROL_CHARS, **_CHAR_REPLACEMENTS})
+
+# Smart double quotes become regular quotes only when escaping for JSON, where
+# they get escaped; in a JSON response a bare '"' would end the string early
+_JSON_QUOTES = str.maketrans({'\u201c': '"', '\u201d': '"'})
+
+# Multi-character tokens, longest first so '~10^26' wins over '^'
+_TOKEN_REPLACEMENTS = {
+    '~10^26': 'approximately 10 to the power of 26',
+    '^': ' to the power of ',
+}
+_TOKEN_RE = re.compile('|'.join(map(re.escape, _TOKEN_REPLACEMENTS)))
+
+_WS_RE = re.compile(r'\s+')
+
+# Anything sanitize_prompt would change: whitespace other than a single space,
+# control characters and the replacement characters above. Quotes and
+# backslashes only matter when escaping for JSON.
+_NEEDS_SANITIZE = re.compile(r'[^\S ]| {2}|[\x00-\x1f\x7f-\x9f\u2018\u2019^≈±∞…–—]')
+_NEEDS_SANITIZE_FOR_JSON = re.compile(r'[^\S ]| {2}|[\x00-\x1f\x7f-\x9f\u2018\u2019\u201c\u201d^≈±∞…–—"\\]')
+
+
+@functools.lru_cache(maxsize=512)
 def sanitize_prompt(text: str, escape_for_json: bool = True) -> str:
     """
     Sanitize the prompt text to handle special characters that might break API calls.
@@ -35,51 +107,101 @@ def sanitize_prompt(text: str, escape_for_json: bool = True) -> str:
     if not text:
         return text
     
-    # Replace problematic characters
-    replacements = {
-        # Smart quotes to regular quotes
-        '"': '"',
-        '"': '"',
-        ''': "'",
-        ''': "'",
-        
-        # Mathematical notation
-        '~10^26': 'approximately 10 to the power of 26',
-        '^': ' to the power of ',
-        '≈': 'approximately',
-        '±': 'plus or minus',
-        '∞': 'infinity',
-        
-        # Other problematic characters
-        '…': '...',
-        '–': '-',
-        '—': '-',
-        
-        # Remove or replace characters that can break JSON
-        '\x00': '',  # null character
-        '\r': ' ',   # carriage return
-        '\t': ' ',   # tab
-    }
+    # Fast path: most ideas and model responses need no changes at all
+    needs_sanitize = _NEEDS_SANITIZE_FOR_JSON if escape_for_json else _NEEDS_SANITIZE
+    if not needs_sanitize.search(text):
+        return text.strip()
     
-    # Apply replacements
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+    # Replace problematic characters and strip control characters
+    text = _TOKEN_RE.sub(lambda m: _TOKEN_REPLACEMENTS[m.group()], text)
+    text = text.translate(_TRANSLATE)
     
     # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Only escape for JSON if requested (not for JSON responses)
     if escape_for_json:
         # Escape backslashes and quotes for JSON safety
+        text = text.translate(_JSON_QUOTES)
         text = text.replace('\\', '\\\\')
         text = text.replace('"', '\\"')
     
-    # Remove any remaining control characters
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-    
     return text.strip()
 
 
+def backoff_delay(attempt: int, base: float, retry_after: Optional[str] = None) -> float:
+    """
+    Compute how long to wait before the next retry.
+    
+    Args:
+        attempt: Zero-based index of the attempt that just failed
+        base: Base delay in seconds, doubled on every attempt
+        retry_after: Value of a Retry-After response header, honored in full when numeric
+    """
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass  # HTTP-date form, fall back to exponential backoff
+    return min(base * 2 ** attempt + random.random(), MAX_RETRY_DELAY)
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    Create the HTTP client shared by all generations in one event loop.
+    
+    HTTP/2 (when httpx[http2] is installed) lets retries and concurrent ideas
+    be multiplexed over one keep-alive TLS connection per host.
+    """
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=10),
+    )
+
+
+# Directories already created during this run
+_CREATED_DIRS = set()
+
+
+def ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per run, skipping repeat syscalls."""
+    if path not in _CREATED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _CREATED_DIRS.add(path)
+
+
+def scene_cache_path(output_dir: str, model: str, prompt: str, temperature: float) -> str:
+    """
+    Path of the on-disk cache entry for a generated video script.
+    
+    The key covers the full prompt, not just the idea, so editing the prompt
+    template invalidates previously cached scripts.
+    """
+    key = hashlib.blake2b(
+        f"{model}|{temperature}|{prompt}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return os.path.join(output_dir, ".cache", f"{key}.json")
+
+
+def write_scene_cache(path: str, video_schema: dict) -> None:
+    """
+    Atomically store a generated video script so reruns can skip the API call.
+    
+    Caching is best-effort: a failed write is reported but never fails the idea.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        ensure_dir(os.path.dirname(path))
+        with open(tmp_path, "wb") as file:
+            file.write(orjson.dumps(video_schema))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write script cache {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class Shot(BaseModel):
     """Technical camera details for a specific clip."""
 
@@ -87,7 +209,7 @@ class Shot(BaseModel):
         ...,
         description="How the shot is framed and the lens used. Examples: 'Medium close-up, 35mm lens, deep focus, smooth gimbal', 'Extreme wide shot, 14mm lens, drone establishing shot with slow reveal', 'Dutch angle, 85mm portrait lens, handheld with intentional camera shake', 'Over-the-shoulder shot, 50mm lens, shallow depth of field'.",
     )
-    camera_motion: str = Field(
+    camera_motion: Optional[str] = Field(
         None,
         description="Describes the movement of the camera during the shot. Examples: 'slow dolly-in 60 cm', 'fast-paced tracking shot following the subject', 'static tripod shot with no movement', 'smooth jib arm crane movement from low to high', 'handheld push-in with slight wobble', 'circular dolly around subject'.",
     )
@@ -95,7 +217,7 @@ class Shot(BaseModel):
         "24 fps",
         description="Frames per second, defining the motion look (24fps is cinematic). Examples: '24 fps', '60 fps for slow-motion effect', '120 fps for extreme slow motion', '12 fps for vintage or stop-motion feel'.",
     )
-    film_grain: float = Field(
+    film_grain: Optional[float] = Field(
         None,
         description="Adds a stylistic film grain effect (0=none, higher values=more grain). Examples: 0.05, 0.15, 0.0, 0.3.",
     )
@@ -142,7 +264,7 @@ class VisualDetails(BaseModel):
         ...,
         description="What the character is physically doing in the scene. Examples: 'Nyx leans on pool edge and, on beat four, fans her hand cheekily toward camera as droplets sparkle in the air', 'Marcus carefully plates microgreens with tweezers, each movement precise and deliberate', 'Luna-7 interfaces with a holographic display, her fingers dancing through floating data streams', 'character parkours across rooftops, leaping between buildings with fluid grace'.",
     )
-    props: str = Field(
+    props: Optional[str] = Field(
         None,
         description="Objects that appear or are interacted with in the scene. Examples: 'floating dollar-sign inflatables', 'antique brass telescope pointing toward star-filled sky', 'holographic chess set with pieces that glow and float', 'vintage motorcycle with chrome details and leather saddlebags'.",
     )
@@ -205,7 +327,7 @@ class AudioTrack(BaseModel):
         2,
         description="The number of audio channels. Examples: 2 (stereo), 1 (mono), 6 (5.1 surround), 8 (7.1 surround).",
     )
-    style: str = Field(
+    style: Optional[str] = Field(
         None,
         description="Describes the musical genre, tempo, and elements for this track. Examples: 'trap-pop rap, 145 BPM, swung hats, sub-bass', 'orchestral score with sweeping strings and dramatic percussion, 60 BPM', 'lo-fi hip hop, 80 BPM, jazzy chords, vinyl crackle', 'synthwave with arpeggiated basslines and retro drums, 120 BPM'.",
     )
@@ -257,7 +379,7 @@ class Clip(BaseModel):
     visual_details: VisualDetails
     cinematography: Cinematography
     audio_track: AudioTrack
-    dialogue: Dialogue
+    dialogue: Optional[Dialogue] = Field(default=None)
     performance: Optional[Performance] = Field(default=None)
     duration_sec: int = Field(
         ...,
@@ -300,7 +422,7 @@ class CharacterProfile(BaseModel):
         ...,
         description="Details the shape and color of the character's eyes. Examples: 'almond-shaped hazel with faint gold flecks', 'wide, ice-blue and piercing', 'deep brown with warm amber highlights', 'green eyes with heterochromia (one blue)', 'glowing crimson without pupils'.",
     )
-    distinguishing_marks: str = Field(
+    distinguishing_marks: Optional[str] = Field(
         None,
         description="Unique features like tattoos, scars, or piercings. Examples: 'tiny star tattoo tucked behind her right ear; gold stud in upper left helix', 'jagged lightning-bolt scar across the left temple', 'intricate sleeve tattoo depicting ocean waves', 'network of glowing cybernetic implants along the jawline'.",
     )
@@ -336,35 +458,30 @@ class VideoSchema(BaseModel):
     )
 
 
-def generate_scenes(
-    idea: str,
-    output_dir: str,
-) -> dict:
-    os.makedirs(output_dir, exist_ok=True)
-
-    if not OPENROUTER_API_KEY:
-        raise ValueError("Please set OPENROUTER_API_KEY environment variable")
+def first_clip(script: dict) -> Clip:
+    """
+    Validate and return the first clip of a generated script.
+    
+    Only this clip is used to build the Veo prompt, so the rest of the script
+    (characters, later clips) is not validated.
+    """
+    return Clip.model_validate(script["clips"][0])
 
-    # Sanitize the idea to prevent API issues with special characters
-    sanitized_idea = sanitize_prompt(idea)
-    print(f"Original idea: {idea}")
-    print(f"Sanitized idea: {sanitized_idea}")
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
+# Optional markdown code fence around a model response, e.g. ```json ... ```
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
 
-    # Create a simpler, more focused prompt to avoid token limits
-    prompt = f"""Create a JSON video script for this idea: {sanitized_idea}
+# Static parts of the script-generation prompt; only the idea varies per call
+_PROMPT_PREFIX = "Create a JSON video script for this idea: "
+_PROMPT_SUFFIX = """
 
 Requirements:
 - Maximum 8 seconds duration
 - Include dialogue
 - Follow this structure:
 
-{{
-  "characters": [{{
+{
+  "characters": [{
     "name": "Character Name",
     "age": 30,
     "height": "6'0\" / 183 cm", 
@@ -377,35 +494,35 @@ Requirements:
     "default_outfit": "outfit description",
     "mouth_shape_intensity": 0.7,
     "eye_contact_ratio": 0.6
-  }}],
-  "clips": [{{
+  }],
+  "clips": [{
     "id": "unique_id",
-    "shot": {{
+    "shot": {
       "composition": "camera shot description",
       "camera_motion": "movement description",
       "frame_rate": "24 fps",
       "film_grain": 0.1,
       "camera": "equipment description"
-    }},
-    "subject": {{
+    },
+    "subject": {
       "description": "character appearance in scene",
       "wardrobe": "outfit for this scene"
-    }},
-    "scene": {{
+    },
+    "scene": {
       "location": "where scene takes place",
       "time_of_day": "mid-day",
       "environment": "environmental details"
-    }},
-    "visual_details": {{
+    },
+    "visual_details": {
       "action": "what character does",
       "props": "objects in scene or null"
-    }},
-    "cinematography": {{
+    },
+    "cinematography": {
       "lighting": "lighting description",
       "tone": "mood/feeling",
       "color_grade": "color scheme"
-    }},
-    "audio_track": {{
+    },
+    "audio_track": {
       "lyrics": "dialogue or null",
       "emotion": "vocal emotion or null",
       "flow": "delivery style or null",
@@ -413,19 +530,36 @@ Requirements:
       "sample_rate_hz": 48000,
       "channels": 2,
       "style": "music style or null"
-    }},
-    "dialogue": {{
+    },
+    "dialogue": {
       "character": "speaking character",
       "line": "spoken text",
       "subtitles": false
-    }},
+    },
     "duration_sec": 8,
     "aspect_ratio": "16:9"
-  }}]
-}}
+  }]
+}
 
 Return ONLY valid JSON, no markdown or extra text."""
 
+
+async def generate_scenes(
+    idea: str,
+    output_dir: str,
+    client: httpx.AsyncClient,
+    log_prefix: str = "",
+) -> dict:
+    ensure_dir(output_dir)
+
+    # Sanitize the idea to prevent API issues with special characters
+    sanitized_idea = sanitize_prompt(idea)
+    print(f"{log_prefix}Original idea: {idea}")
+    print(f"{log_prefix}Sanitized idea: {sanitized_idea}")
+
+    # Create a simpler, more focused prompt to avoid token limits
+    prompt = _PROMPT_PREFIX + sanitized_idea + _PROMPT_SUFFIX
+
     data = {
         "model": "google/gemini-2.5-pro",
         "messages": [
@@ -438,14 +572,33 @@ Return ONLY valid JSON, no markdown or extra text."""
         "max_tokens": 8000,  # Increased token limit
     }
 
+    # Reuse the script from a previous run of the same idea if we have a usable one
+    cache_path = scene_cache_path(output_dir, data["model"], prompt, data["temperature"])
+    try:
+        with open(cache_path, "rb") as file:
+            video_schema = orjson.loads(file.read())
+        first_clip(video_schema)
+        print(f"{log_prefix}Using cached script: {cache_path}")
+        return video_schema
+    except (OSError, ValueError, LookupError, TypeError):
+        pass  # missing, unreadable or invalid entry; ValueError covers JSON and validation errors
+
+    if not OPENROUTER_API_KEY:
+        raise ValueError("Please set OPENROUTER_API_KEY environment variable")
+
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
     max_retries = 3
     retry_delay = 2  # seconds
     
     for attempt in range(max_retries):
         try:
-            print(f"Attempt {attempt + 1} of {max_retries}...")
+            print(f"{log_prefix}Attempt {attempt + 1} of {max_retries}...")
             
-            response = requests.post(
+            response = await client.post(
                 f"{OPENROUTER_BASE_URL}/chat/completions",
                 headers=headers,
                 json=data,
@@ -453,14 +606,17 @@ Return ONLY valid JSON, no markdown or extra text."""
             )
 
             if response.status_code == 429:  # Rate limited
-                print(f"Rate limited, waiting {retry_delay * (attempt + 1)} seconds...")
-                time.sleep(retry_delay * (attempt + 1))
-                continue
+                delay = backoff_delay(attempt, retry_delay, response.headers.get("Retry-After"))
+                if attempt < max_retries - 1 and delay <= MAX_RETRY_DELAY:
+                    print(f"{log_prefix}Rate limited, waiting {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+                    continue
+                raise Exception(f"OpenRouter rate limit: retry after {delay:.1f} seconds")
                 
             if response.status_code != 200:
-                print(f"API error {response.status_code}: {response.text}")
+                print(f"{log_prefix}API error {response.status_code}: {response.text}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(backoff_delay(attempt, retry_delay))
                     continue
                 raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
 
@@ -469,66 +625,75 @@ Return ONLY valid JSON, no markdown or extra text."""
             
             # Check if content is empty or just ellipsis
             if not content or content.strip() in ["", "...", "…"]:
-                print(f"Empty response on attempt {attempt + 1}")
+                print(f"{log_prefix}Empty response on attempt {attempt + 1}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(backoff_delay(attempt, retry_delay))
                     continue
                 raise Exception("Received empty response from OpenRouter")
             
             # Clean up the content if it has markdown formatting
-            if content.startswith("```json"):
-                content = content.strip("```json").strip("```")
-            elif content.startswith("```"):
-                content = content.strip("```")
-            
-            # Additional cleanup for any remaining markdown
-            content = content.strip().strip("`")
+            content = _FENCE_RE.sub("", content).strip().strip("`")
             
             # Sanitize the content but don't escape quotes (it's already JSON)
             content = sanitize_prompt(content, escape_for_json=False)
             
             # Check if JSON looks complete (should end with closing brace)
             if not content.strip().endswith('}'):
-                print(f"Truncated JSON detected on attempt {attempt + 1}")
+                print(f"{log_prefix}Truncated JSON detected on attempt {attempt + 1}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(backoff_delay(attempt, retry_delay))
                     continue
                 raise Exception("Received truncated JSON response from OpenRouter")
             
             try:
-                video_schema = json.loads(content)
-                print(f"Successfully parsed JSON on attempt {attempt + 1}")
-                return video_schema
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error on attempt {attempt + 1}: {e}")
-                print(f"Content that failed to parse: {content[:500]}...")
+                video_schema = orjson.loads(content)
+                print(f"{log_prefix}Successfully parsed JSON on attempt {attempt + 1}")
+            except orjson.JSONDecodeError as e:
+                print(f"{log_prefix}JSON decode error on attempt {attempt + 1}: {e}")
+                print(f"{log_prefix}Content that failed to parse: {content[:500]}...")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(backoff_delay(attempt, retry_delay))
                     continue
                 raise Exception(f"Failed to parse JSON response from OpenRouter: {e}")
+            
+            # Only cache scripts generate_video can use; retry invalid ones and
+            # hand the last one over uncached so it can fall back to the raw prompt
+            try:
+                first_clip(video_schema)
+            except (ValidationError, LookupError, TypeError) as e:
+                print(f"{log_prefix}Invalid video script on attempt {attempt + 1}: {e}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(backoff_delay(attempt, retry_delay))
+                    continue
+                return video_schema
+            
+            write_scene_cache(cache_path, video_schema)
+            return video_schema
                 
-        except requests.exceptions.Timeout:
-            print(f"Request timeout on attempt {attempt + 1}")
+        except httpx.TimeoutException:
+            print(f"{log_prefix}Request timeout on attempt {attempt + 1}")
             if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+                await asyncio.sleep(backoff_delay(attempt, retry_delay))
                 continue
             raise Exception("Request to OpenRouter timed out")
-        except requests.exceptions.RequestException as e:
-            print(f"Request error on attempt {attempt + 1}: {e}")
+        except httpx.HTTPError as e:
+            print(f"{log_prefix}Request error on attempt {attempt + 1}: {e}")
             if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+                await asyncio.sleep(backoff_delay(attempt, retry_delay))
                 continue
             raise Exception(f"Request to OpenRouter failed: {e}")
     
     raise Exception(f"Failed to get valid response after {max_retries} attempts")
 
 
-def generate_video(
+async def generate_video(
     prompt: str,
+    client: httpx.AsyncClient,
     output_dir: str = "videos",
     fname: str = "video.mp4",
+    log_prefix: str = "",
 ) -> str:
-    os.makedirs(output_dir, exist_ok=True)
+    ensure_dir(output_dir)
 
     # Check for Replicate API token (either REPLICATE_API_TOKEN or REPLICATE_API_KEY)
     if not os.getenv("REPLICATE_API_TOKEN") and not os.getenv("REPLICATE_API_KEY"):
@@ -536,114 +701,162 @@ def generate_video(
 
     # Parse the JSON script to create a more concise prompt for Veo 3
     try:
-        script_data = json.loads(prompt)
+        script_data = orjson.loads(prompt)
         
         # Extract key information from the first clip to create a focused prompt
-        if script_data.get("clips") and len(script_data["clips"]) > 0:
-            clip = script_data["clips"][0]
+        if script_data.get("clips"):
+            clip = first_clip(script_data)
             
             # Build a concise, descriptive prompt from the script
-            video_prompt = f"{clip['cinematography']['tone']} scene: "
-            video_prompt += f"{clip['subject']['description']}. "
-            video_prompt += f"{clip['visual_details']['action']} "
-            video_prompt += f"Location: {clip['scene']['location']}. "
-            video_prompt += f"Shot: {clip['shot']['composition']}. "
-            video_prompt += f"Lighting: {clip['cinematography']['lighting']}. "
-            video_prompt += f"Color grade: {clip['cinematography']['color_grade']}."
-            
-            if clip.get('dialogue'):
-                video_prompt += f" Character says: '{clip['dialogue']['line']}'"
+            dialogue = ""
+            if clip.dialogue and clip.dialogue.line:
+                dialogue = f" Character says: '{clip.dialogue.line}'"
+            video_prompt = (
+                f"{clip.cinematography.tone} scene: "
+                f"{clip.subject.description}. "
+                f"{clip.visual_details.action} "
+                f"Location: {clip.scene.location}. "
+                f"Shot: {clip.shot.composition}. "
+                f"Lighting: {clip.cinematography.lighting}. "
+                f"Color grade: {clip.cinematography.color_grade}."
+                f"{dialogue}"
+            )
         else:
             # Fallback to using the raw prompt if parsing fails
             video_prompt = prompt[:500]  # Limit length for Veo 3
+    except ValidationError as e:
+        print(f"{log_prefix}First clip of the script failed validation, using raw prompt: {e}")
+        video_prompt = prompt[:500]
     except Exception as e:
-        print(f"Error parsing JSON script: {e}")
+        print(f"{log_prefix}Error parsing JSON script: {e}")
         # If JSON parsing fails, use a truncated version of the prompt
         video_prompt = prompt[:500]
 
     # Sanitize the video prompt for Veo 3 (don't escape quotes, it's not JSON)
+    # and keep it under ~400 characters to be safe, cutting on a word boundary
     video_prompt = sanitize_prompt(video_prompt, escape_for_json=False)
-    
-    # Ensure the prompt isn't too long for Veo 3 (limit to ~400 characters to be safe)
     if len(video_prompt) > 400:
-        video_prompt = video_prompt[:397] + "..."
+        cut = video_prompt.rfind(" ", 0, 397)
+        if cut < 300:
+            # No word boundary near the limit (e.g. raw JSON or one long token),
+            # so cut mid-word rather than throw most of the prompt away
+            cut = 397
+        video_prompt = video_prompt[:cut] + "..."
 
     # Generate video using Replicate
-    print(f"Generating video from prompt: {video_prompt[:100]}...")
-    print("This may take 30-60 seconds...")
+    print(f"{log_prefix}Generating video from prompt: {video_prompt[:100]}...")
+    print(f"{log_prefix}This may take 30-60 seconds...")
     
     try:
         input_data = {
             "prompt": video_prompt
         }
         
-        print("Sending request to Veo 3 Fast...")
-        output = replicate.run(
+        print(f"{log_prefix}Sending request to Veo 3 Fast...")
+        output = await replicate.async_run(
             "google/veo-3-fast",
             input=input_data
         )
         
         # Download and save the video
         video_path = os.path.join(output_dir, fname)
-        print(f"Video generation complete! Downloading to {video_path}...")
+        print(f"{log_prefix}Video generation complete! Downloading to {video_path}...")
+        
+        # Some models return a list of outputs; the video is the first one
+        if isinstance(output, list):
+            output = output[0]
         
-        with open(video_path, "wb") as file:
-            file.write(output.read())
+        # Stream straight to disk instead of buffering the whole MP4 in memory,
+        # via a temp file so a failed download never leaves a truncated video
+        tmp_path = f"{video_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                if FileOutput is not None and isinstance(output, FileOutput):
+                    async for chunk in output:
+                        file.write(chunk)
+                else:
+                    # Older replicate releases return a plain URL string
+                    async with client.stream("GET", str(output)) as response:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+            os.replace(tmp_path, video_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         
-        print(f"✅ Video saved successfully: {video_path}")
+        print(f"{log_prefix}✅ Video saved successfully: {video_path}")
         return video_path
         
     except Exception as e:
-        print(f"❌ Error generating video: {e}")
+        print(f"{log_prefix}❌ Error generating video: {e}")
         raise
 
 
-def generate(
+async def generate(
     idea: str,
     output_dir: str = "videos",
     filename: str = "video.mp4",
+    client: Optional[httpx.AsyncClient] = None,
+    log_prefix: str = "",
 ) -> None:
     """Generates a complete video with multiple scenes."""
-    os.makedirs(output_dir, exist_ok=True)
+    ensure_dir(output_dir)
 
-    script = generate_scenes(
+    if client is None:
+        async with create_client() as client:
+            return await generate(idea, output_dir, filename, client, log_prefix)
+
+    script = await generate_scenes(
         idea=idea,
         output_dir=output_dir,
+        client=client,
+        log_prefix=log_prefix,
     )
 
-    generate_video(
-        json.dumps(script),
+    await generate_video(
+        orjson.dumps(script).decode(),
+        client=client,
         fname=filename,
         output_dir=output_dir,
+        log_prefix=log_prefix,
     )
 
 
+async def main(ideas: List[str]) -> None:
+    """Generates videos for all ideas concurrently, a few at a time."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+
+    async def _bounded(client: httpx.AsyncClient, i: int, idea: str) -> None:
+        # Tag every log line so interleaved output can be traced to its idea
+        log_prefix = f"[{i+1}/{len(ideas)}] "
+        async with semaphore:
+            try:
+                print(f"\n{'='*60}")
+                print(f"{log_prefix}Processing idea {i+1}/{len(ideas)}")
+                print(f"{'='*60}")
+
+                await generate(
+                    idea=idea,
+                    filename=f"{idea[:30].lower().replace(' ', '-')}.mp4",
+                    client=client,
+                    log_prefix=log_prefix,
+                )
+            except Exception as e:
+                print(f"{log_prefix}Failed to generate video for idea: {idea[:50]}...")
+                print(f"{log_prefix}Error: {e}")
+
+    async with create_client() as client:
+        await asyncio.gather(*(_bounded(client, i, idea) for i, idea in enumerate(ideas)))
+
+
 if __name__ == "__main__":
     ideas = [
-        "Type II civilizations large-scale quantum teleporter with city around it. Dramatic music. No text."
-        "Cinematic shot of a dimly lit garage. The Lamborghini Aventadors headlights flicker on. Engine roars to life. Doors rise like wings. Light dances on the sharp curves. No text."
-        "Cinematic shot of a sunlit diner counter. A chilled Coca-Cola bottle hisses open, pours itself into a glass. Fizz rises. Light catches the red label. No text."
-        "Cinematic shot of a sunlit Scandinavian bedroom. A sealed IKEA box trembles, opens, and flat pack furniture assembles rapidly into a serene, styled room highlighted by a yellow IKEA throw on the bed. No text."
-        "A yeti being a confused tourist in central London. No text."
+        "Type II civilizations large-scale quantum teleporter with city around it. Dramatic music. No text.",
+        "Cinematic shot of a dimly lit garage. The Lamborghini Aventadors headlights flicker on. Engine roars to life. Doors rise like wings. Light dances on the sharp curves. No text.",
+        "Cinematic shot of a sunlit diner counter. A chilled Coca-Cola bottle hisses open, pours itself into a glass. Fizz rises. Light catches the red label. No text.",
+        "Cinematic shot of a sunlit Scandinavian bedroom. A sealed IKEA box trembles, opens, and flat pack furniture assembles rapidly into a serene, styled room highlighted by a yellow IKEA throw on the bed. No text.",
+        "A yeti being a confused tourist in central London. No text.",
     ]
 
-    for i, idea in enumerate(ideas):
-        try:
-            print(f"\n{'='*60}")
-            print(f"Processing idea {i+1}/{len(ideas)}")
-            print(f"{'='*60}")
-            
-            generate(
-                idea=idea,
-                filename=f"{idea[:30].lower().replace(' ', '-')}.mp4",
-            )
-            
-            # Add delay between generations to avoid rate limits
-            if i < len(ideas) - 1:  # Don't wait after the last one
-                print("Waiting 5 seconds before next generation...")
-                time.sleep(5)
-                
-        except Exception as e:
-            print(f"Failed to generate video for idea: {idea[:50]}...")
-            print(f"Error: {e}")
-            continue  # Skip to next idea instead of rerunning
+    asyncio.run(main(ideas))